@@ -32,6 +32,12 @@ import google.genai.types as genai_types
 
 # Your standalone validator and suggestion functions
 from .validate import validate_hsn_code, suggest_hsn_codes
+from . import validate as _validate
+
+# Patterns used to parse free-text user messages, compiled once
+_QUERY_RE = re.compile(r'query:\s*([^\n\r]+)', re.IGNORECASE)
+_HSN_RE = re.compile(r'\b\d{2,8}\b')
+_DIGIT_RE = re.compile(r'\d')
 
 
 class ValidateHSNAgent(BaseAgent):
@@ -105,15 +111,15 @@ class ValidateHSNAgent(BaseAgent):
         
         # Extract query - look for "query:" or just use numbers/text
         if "query:" in user_message.lower():
-            query_match = re.search(r'query:\s*([^\n\r]+)', user_message, re.IGNORECASE)
+            query_match = _QUERY_RE.search(user_message)
             if query_match:
                 query = query_match.group(1).strip()
         else:
             # Auto-detect: if contains digits, likely validation; otherwise suggestion
-            if re.search(r'\d', user_message):
+            if _DIGIT_RE.search(user_message):
                 action = "validate"
                 # Extract all sequences that look like HSN codes (2-8 digits, possibly with commas/spaces)
-                hsn_matches = re.findall(r'\b\d{2,8}\b', user_message)
+                hsn_matches = _HSN_RE.findall(user_message)
                 if hsn_matches:
                     query = ", ".join(hsn_matches)
                 else:
@@ -123,10 +129,15 @@ class ValidateHSNAgent(BaseAgent):
                 query = user_message.strip()
         
         try:
-            # Call the synchronous run method with keyword arguments
-            result = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.run(query=query, action=action)
-            )
+            # Call the synchronous run method with keyword arguments.
+            # Once the code tables are loaded, validation is a handful of dict
+            # lookups, cheaper than a thread hop, so it runs inline. The first
+            # call parses the CSV, so until then it is moved off the event
+            # loop like the suggestion search.
+            if action == "validate" and _validate._loaded:
+                result = self.run(query=query, action=action)
+            else:
+                result = await asyncio.to_thread(self.run, query=query, action=action)
             
             # Format the result as readable text for display
             if action == "validate":
@@ -7,28 +7,124 @@ Standalone validator and suggestion functions that work with google-adk 1.1.1
 """
 from pathlib import Path
 import csv
+import heapq
 import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
 from typing import Dict, List, Tuple
-from difflib import SequenceMatcher
 
-# ---------- locate the CSV once, at import time ----------
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# ---------- locate the CSV at import time; parse it on first use ----------
 DATA_DIR  = Path(__file__).with_suffix("").with_name("data")   # …/hsn_agent/data
 DATA_FILE = DATA_DIR / "hsn_codes.csv"                        # …/hsn_agent/data/hsn_codes.csv
-VALID_CODES: set[str] = set()
-HSN_DATA: dict[str, str] = {}  # code -> description mapping
+VALID_CODES: set[str]
+HSN_DATA: dict[str, str]  # code -> description mapping
+TRIE: dict                # digit trie over all codes, see _load_tables()
 # ---------------------------------------------------------
 
-# Load HSN codes and descriptions
-with DATA_FILE.open(newline="", encoding="utf-8") as f:
-    reader = csv.reader(f)
-    next(reader)  # Skip header if present
-    for row in reader:
-        if row and len(row) >= 2:
-            code = row[0].strip().strip('"')
-            description = row[1].strip() if len(row) > 1 else ""
-            if code:  # Only add non-empty codes
-                VALID_CODES.add(code)
-                HSN_DATA[code] = description
+# Parallel code/description columns for the suggestion search; rapidfuzz
+# reports matches by position, which maps straight back into _CODES.
+_CODES: list[str]
+_DESCS: list[str]
+_DESCS_LOWER: list[str]          # _DESCS lower-cased once, for matching
+INVERTED: dict[str, list[int]]   # word -> positions of descriptions containing it
+
+# Names bound on first use; reading one from outside the module loads it.
+# Validation only needs the code tables; the suggestion index is built
+# separately, the first time a suggestion is requested.
+_CODE_TABLES = ("VALID_CODES", "HSN_DATA", "TRIE")
+_SUGGEST_TABLES = ("_CODES", "_DESCS", "_DESCS_LOWER", "INVERTED")
+_load_lock = threading.Lock()
+_loaded = False
+_index_lock = threading.Lock()
+_index_loaded = False
+
+def _load_tables() -> None:
+    """Parse hsn_codes.csv and bind VALID_CODES, HSN_DATA and TRIE."""
+    global VALID_CODES, HSN_DATA, TRIE
+
+    # Load HSN codes and descriptions column-wise: the C csv parser yields
+    # the rows, and the code/description columns are built in one shot
+    with DATA_FILE.open(newline="", encoding="utf-8") as f:
+        # The csv module already unquotes fields; skipinitialspace also
+        # handles a quoted field that follows ", "
+        reader = csv.reader(f, quotechar='"', skipinitialspace=True)
+        next(reader)  # Skip header if present
+        rows = [row for row in reader if len(row) >= 2]
+
+    codes = [row[0].strip() for row in rows]
+    descriptions = [row[1].strip() for row in rows]
+    hsn_data = dict(zip(codes, descriptions))
+    hsn_data.pop("", None)  # Only keep non-empty codes
+
+    # Digit trie: one nested dict per digit, with the code's description
+    # stored under "$" on the node where a code ends
+    trie: dict = {}
+    for code, description in hsn_data.items():
+        node = trie
+        for digit in code:
+            node = node.setdefault(digit, {})
+        node["$"] = description
+
+    VALID_CODES = set(hsn_data)
+    HSN_DATA = hsn_data
+    TRIE = trie
+
+def _build_suggest_index() -> None:
+    """Bind the suggestion columns and INVERTED from the loaded HSN_DATA."""
+    global _CODES, _DESCS, _DESCS_LOWER, INVERTED
+
+    codes, descs, descs_lower = [], [], []
+    inverted: dict[str, list[int]] = {}
+    for code, description in HSN_DATA.items():
+        if description:  # Only codes with descriptions can be suggested
+            desc_lower = description.lower()
+            for word in set(desc_lower.split()):
+                inverted.setdefault(word, []).append(len(codes))
+            codes.append(code)
+            descs.append(description)
+            descs_lower.append(desc_lower)
+
+    _CODES, _DESCS, _DESCS_LOWER = codes, descs, descs_lower
+    INVERTED = inverted
+
+def _ensure_loaded() -> None:
+    """Build the code tables once, on first use; safe to call from any thread."""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if not _loaded:
+            _load_tables()
+            _loaded = True
+
+def _ensure_suggest_index() -> None:
+    """Build the code tables and the suggestion index once, on first use."""
+    global _index_loaded
+    if _index_loaded:
+        return
+    _ensure_loaded()
+    with _index_lock:
+        if not _index_loaded:
+            _build_suggest_index()
+            _index_loaded = True
+
+def __getattr__(name: str):
+    if name in _CODE_TABLES:
+        _ensure_loaded()
+        return globals()[name]
+    if name in _SUGGEST_TABLES:
+        _ensure_suggest_index()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Descriptions sharing no word with the query score 0.7 * similarity at most,
+# so anything below this similarity can never clear the 0.1 threshold.
+_MIN_SIMILARITY = 0.1 / 0.7 * 100
 
 def is_valid_hsn_format(code: str) -> Tuple[bool, str]:
     """
@@ -40,6 +136,11 @@ def is_valid_hsn_format(code: str) -> Tuple[bool, str]:
     Returns:
         Tuple of (is_valid, error_message)
     """
+    # Fast path for well-formed codes; the checks below only run to explain
+    # why a code was rejected
+    if 2 <= len(code) <= 8 and code.isdigit():
+        return True, ""
+    
     if not code:
         return False, "Empty code"
     
@@ -59,8 +160,82 @@ def is_valid_hsn_format(code: str) -> Tuple[bool, str]:
     return True, ""
 
 def get_similarity_score(text1: str, text2: str) -> float:
-    """Calculate similarity score between two text strings."""
-    return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+    """Calculate similarity score (0-1) between two text strings."""
+    return fuzz.ratio(text1.lower(), text2.lower()) / 100
+
+def _top_confidences(positions: np.ndarray, final_scores: np.ndarray, k: int) -> List[Tuple[float, int]]:
+    """
+    Return (confidence, position) pairs for the k best final scores, plus any
+    others that may round to the same 3-decimal confidence as the k-th.
+    """
+    if len(final_scores) > k:
+        kth = np.partition(final_scores, -k)[-k]
+        keep = final_scores >= kth - 0.001
+        positions, final_scores = positions[keep], final_scores[keep]
+    return [(round(score, 3), idx) for idx, score in zip(positions.tolist(), final_scores.tolist())]
+
+@lru_cache(maxsize=4096)
+def _suggest_cached(description: str, max_suggestions: int) -> tuple:
+    """
+    Rank HSN codes for an already stripped, lower-cased description.
+
+    The tables never change once loaded, so the result only depends on the
+    arguments and is memoized; it is returned as a tuple of
+    (code, description, confidence) tuples so cached entries stay immutable.
+    """
+    if max_suggestions <= 0:
+        return ()
+    
+    query_words = set(description.split())
+    n_words = max(len(query_words), 1)
+    
+    # Only descriptions sharing at least one word with the query have keyword
+    # overlap, so only they need the full blended score. Each posting list
+    # holds a description once per word, so counting positions across the
+    # query words' postings yields the overlap size directly.
+    candidates = Counter(chain.from_iterable(INVERTED.get(w, ()) for w in query_words))
+    cand = np.fromiter(candidates.keys(), dtype=np.intp, count=len(candidates))
+    shared = np.fromiter(candidates.values(), dtype=np.float64, count=len(candidates))
+    
+    # rapidfuzz's cdist scores all candidates in one call; there are usually
+    # too few of them to be worth starting its thread pool for
+    similarity = process.cdist(
+        [description], [_DESCS_LOWER[idx] for idx in cand.tolist()],
+        scorer=fuzz.ratio, dtype=np.float64
+    )[0]
+    
+    # Combine similarity scores
+    final_scores = (similarity / 100 * 0.7) + (shared / n_words * 0.3)
+    keep = final_scores > 0.1  # Minimum threshold
+    scored = _top_confidences(cand[keep], final_scores[keep], max_suggestions)
+    
+    # The k-th best candidate confidence is a floor any other description
+    # has to reach to make the top-k; handing it to rapidfuzz as a coarse
+    # cutoff lets it skip most of the table without scoring it exactly
+    min_similarity = _MIN_SIMILARITY
+    if len(scored) >= max_suggestions:
+        kth = heapq.nlargest(max_suggestions, (conf for conf, _ in scored))[-1]
+        # Allow for rounding to 3 decimals; rapidfuzz caps cutoffs at 100
+        min_similarity = min(max(min_similarity, (kth - 0.001) / 0.7 * 100), 100)
+    
+    # Every other description scores 0.7 * similarity. This pass covers the
+    # whole table, so cdist splits it across rapidfuzz's own thread pool
+    # (workers=-1) without holding the GIL; entries below the cutoff come
+    # back as 0
+    similarity = process.cdist(
+        [description], _DESCS_LOWER, scorer=fuzz.ratio,
+        score_cutoff=min_similarity, dtype=np.float64, workers=-1
+    )[0]
+    similarity[cand] = 0  # already blended above
+    hits = np.flatnonzero(similarity)
+    final_scores = similarity[hits] / 100 * 0.7
+    keep = final_scores > 0.1
+    others = _top_confidences(hits[keep], final_scores[keep], max_suggestions)
+    
+    # Highest confidence first; ties keep the CSV order
+    best = heapq.nlargest(max_suggestions, scored + others, key=lambda s: (s[0], -s[1]))
+    
+    return tuple((_CODES[idx], _DESCS[idx], confidence) for confidence, idx in best)
 
 def suggest_hsn_codes(description: str, max_suggestions: int = 5) -> dict:
     """
@@ -68,7 +243,7 @@ def suggest_hsn_codes(description: str, max_suggestions: int = 5) -> dict:
     
     Args:
         description: Product or service description
-        max_suggestions: Maximum number of suggestions to return
+        max_suggestions: Maximum number of suggestions to return (none if zero or negative)
         
     Returns:
         dict: {"suggestions": [{"code": str, "description": str, "confidence": float}]}
@@ -79,37 +254,72 @@ def suggest_hsn_codes(description: str, max_suggestions: int = 5) -> dict:
             "error": "Empty description provided"
         }
     
+    _ensure_suggest_index()
     description = description.strip().lower()
-    suggestions = []
-    
-    # Search for matching descriptions
-    for code, desc in HSN_DATA.items():
-        if desc:  # Only consider codes with descriptions
-            similarity = get_similarity_score(description, desc)
-            
-            # Also check for keyword matches
-            desc_words = set(desc.lower().split())
-            query_words = set(description.split())
-            keyword_overlap = len(desc_words.intersection(query_words)) / max(len(query_words), 1)
-            
-            # Combine similarity scores
-            final_score = (similarity * 0.7) + (keyword_overlap * 0.3)
-            
-            if final_score > 0.1:  # Minimum threshold
-                suggestions.append({
-                    "code": code,
-                    "description": desc,
-                    "confidence": round(final_score, 3)
-                })
-    
-    # Sort by confidence score (descending)
-    suggestions.sort(key=lambda x: x["confidence"], reverse=True)
     
     return {
-        "suggestions": suggestions[:max_suggestions],
+        "suggestions": [
+            {"code": code, "description": desc, "confidence": confidence}
+            for code, desc, confidence in _suggest_cached(description, max_suggestions)
+        ],
         "query": description
     }
 
+@lru_cache(maxsize=4096)
+def _validate_single(c: str) -> dict:
+    """
+    Validate one stripped, non-empty HSN code.
+
+    Memoized per code; callers must copy the returned dict before handing
+    it out so the cached entry cannot be mutated.
+    """
+    # Format validation first
+    is_valid_format, format_error = is_valid_hsn_format(c)
+    if not is_valid_format:
+        return {
+            "valid": False,
+            "nearest": None,
+            "description": None,
+            "error": f"Format error: {format_error}"
+        }
+
+    # Check if exact code exists
+    if c in VALID_CODES:
+        return {
+            "valid": True,
+            "nearest": c,
+            "description": HSN_DATA.get(c, ""),
+            "error": None
+        }
+
+    # Hierarchical validation - a single trie descent finds the deepest
+    # existing code that prefixes c
+    node = TRIE
+    depth = ancestor_len = 0
+    for digit in c:
+        node = node.get(digit)
+        if node is None:
+            break
+        depth += 1
+        if "$" in node:
+            ancestor_len, ancestor_desc = depth, node["$"]
+
+    if ancestor_len:
+        ancestor = c[:ancestor_len]
+        return {
+            "valid": False,
+            "nearest": ancestor,
+            "description": ancestor_desc,
+            "error": f"Code not found, but parent '{ancestor}' exists"
+        }
+
+    return {
+        "valid": False,
+        "nearest": None,
+        "description": None,
+        "error": "Code not found and no valid parent codes exist"
+    }
+
 def validate_hsn_code(code: str) -> dict:
     """
     Args
@@ -122,52 +332,13 @@ def validate_hsn_code(code: str) -> dict:
     dict
         {input_code: {"valid": bool, "nearest": str | None, "description": str | None, "error": str | None}}
     """
+    _ensure_loaded()
     out: dict[str, dict] = {}
 
-    for raw in code.split(","):
-        c = raw.strip()
+    for c in map(str.strip, code.split(",")):
         if not c:
             continue
 
-        # Format validation first
-        is_valid_format, format_error = is_valid_hsn_format(c)
-        if not is_valid_format:
-            out[c] = {
-                "valid": False,
-                "nearest": None,
-                "description": None,
-                "error": f"Format error: {format_error}"
-            }
-            continue
-
-        # Check if exact code exists
-        if c in VALID_CODES:
-            out[c] = {
-                "valid": True,
-                "nearest": c,
-                "description": HSN_DATA.get(c, ""),
-                "error": None
-            }
-            continue
-
-        # Hierarchical validation - find nearest ancestor
-        ancestor = c[:-1]
-        while ancestor and ancestor not in VALID_CODES:
-            ancestor = ancestor[:-1]
-
-        if ancestor:
-            out[c] = {
-                "valid": False,
-                "nearest": ancestor,
-                "description": HSN_DATA.get(ancestor, ""),
-                "error": f"Code not found, but parent '{ancestor}' exists"
-            }
-        else:
-            out[c] = {
-                "valid": False,
-                "nearest": None,
-                "description": None,
-                "error": "Code not found and no valid parent codes exist"
-            }
+        out[c] = dict(_validate_single(c))
 
     return out
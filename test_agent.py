@@ -4,7 +4,8 @@ Test script for HSN Code Validation and Suggestion Agent
 """
 
 import json
-from hsn_agent.validate import validate_hsn_code, suggest_hsn_codes
+from rapidfuzz import fuzz
+from hsn_agent.validate import validate_hsn_code, suggest_hsn_codes, HSN_DATA
 
 def test_validation():
     """Test HSN code validation functionality"""
@@ -49,6 +50,34 @@ def test_suggestion():
         result = suggest_hsn_codes(description)
         print(json.dumps(result, indent=2))
 
+def reference_suggestions(description, max_suggestions):
+    """Brute-force ranking: score every description, sort, take the top k"""
+    query = description.strip().lower()
+    query_words = set(query.split())
+    suggestions = []
+    for code, desc in HSN_DATA.items():
+        if desc:
+            similarity = fuzz.ratio(query, desc.lower()) / 100
+            keyword_overlap = len(set(desc.lower().split()) & query_words) / max(len(query_words), 1)
+            final_score = (similarity * 0.7) + (keyword_overlap * 0.3)
+            if final_score > 0.1:
+                suggestions.append({"code": code, "description": desc, "confidence": round(final_score, 3)})
+    suggestions.sort(key=lambda x: x["confidence"], reverse=True)
+    return suggestions[:max(max_suggestions, 0)]
+
+def test_suggestion_ranking():
+    """Test the pruned suggestion search against the brute-force ranking"""
+    print("\n" + "=" * 60)
+    print("TESTING SUGGESTION RANKING")
+    print("=" * 60)
+    
+    # "zzzz" shares no word with any description
+    for description in ["live horses for breeding", "mobile phones and smartphones", "zzzz"]:
+        for k in (0, 1, 5):
+            result = suggest_hsn_codes(description, k)
+            assert result["suggestions"] == reference_suggestions(description, k), (description, k)
+            print(f"'{description}' (max_suggestions={k}): matches reference")
+
 def test_agent_integration():
     """Test the complete agent functionality"""
     print("\n" + "=" * 60)
@@ -75,6 +104,7 @@ def test_agent_integration():
 if __name__ == "__main__":
     test_validation()
     test_suggestion() 
+    test_suggestion_ranking()
     test_agent_integration()
     print("\n" + "=" * 60)
     print("TEST COMPLETED")